@@ -1,25 +1,24 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, abort
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
 import os
 import json
 import uuid
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from datetime import datetime, timedelta
+from email.message import EmailMessage
+from datetime import datetime
 import io
 import re
-import tempfile
-import shutil
-from typing import Dict, List, Any, Optional
+import hashlib
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Union, BinaryIO
+import httpx
+import orjson
+from cachetools import TLRUCache, TTLCache
 from groq import Groq
-import numpy as np
-import pdfplumber
-from docx import Document
-import psycopg2
-import langchain
-from psycopg2.extras import RealDictCursor
-from supabase import create_client, Client
+from db import supabase
 
 # Environment
 from dotenv import load_dotenv
@@ -27,28 +26,41 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
+class OrjsonProvider(DefaultJSONProvider):
+    """Serialize JSON responses with orjson, falling back to Flask's defaults for other types"""
+    option = orjson.OPT_NAIVE_UTC | orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+    
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-here')
+# Matches the storage bucket limit; larger bodies are rejected before they are buffered
+app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_UPLOAD_SIZE', 10 * 1024 * 1024))
 CORS(app)
 
-# Initialize Supabase client
-SUPABASE_URL = os.getenv('SUPABASE_URL')
-SUPABASE_ANON_KEY = os.getenv('SUPABASE_ANON_KEY')
-# SUPABASE_SERVICE_ROLE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
-
-# if not all([SUPABASE_URL, SUPABASE_ANON_KEY, SUPABASE_SERVICE_ROLE_KEY]):
-#     raise ValueError("Missing required Supabase environment variables")
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-
 # Initialize AI models
 LLM_PROVIDER = os.getenv('LLM_PROVIDER', 'groq')
 GROQ_API_KEY = os.getenv('GROQ_API_KEY')
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
+# One HTTP/2 connection pool per process so LLM calls skip repeated TCP+TLS handshakes
+llm_http = httpx.Client(
+    http2=True,
+    limits=httpx.Limits(
+        max_connections=int(os.getenv('LLM_MAX_CONNECTIONS', 100)),
+        max_keepalive_connections=int(os.getenv('LLM_MAX_KEEPALIVE', 50))
+    ),
+    timeout=30
+)
+
 # Initialize LLM
 if LLM_PROVIDER == 'groq' and GROQ_API_KEY:
-    groq_client = Groq(api_key=GROQ_API_KEY)
+    groq_client = Groq(api_key=GROQ_API_KEY, http_client=llm_http)
     gemini_client = None
 elif LLM_PROVIDER == 'gemini' and GEMINI_API_KEY:
     # import google.generativeai as genai
@@ -58,8 +70,49 @@ elif LLM_PROVIDER == 'gemini' and GEMINI_API_KEY:
 else:
     raise ValueError("Invalid LLM provider or missing API key")
 
-# Initialize sentence transformer for embeddings
-# sentence_model = SentenceTransformer('all-MiniLM-L6-v2')
+ANALYSIS_MODEL = "llama-3.1-8b-instant"
+ANALYSIS_TEMPERATURE = 0.1
+
+# NL-to-SQL against a small fixed schema is a lighter task; GROQ_SQL_MODEL can opt into a smaller model
+SQL_MODEL = os.getenv('GROQ_SQL_MODEL', ANALYSIS_MODEL)
+
+# Prompt budget for the job description and resume text
+JOB_DESCRIPTION_LIMIT = 2000
+RESUME_TEXT_LIMIT = 3000
+
+# PDF extraction stops after this many characters; only the start reaches the prompt
+RESUME_EXTRACT_LIMIT = 2 * RESUME_TEXT_LIMIT
+
+# Resumes shorter than this are not worth an LLM call
+MIN_RESUME_TEXT_LENGTH = 200
+
+# Number of resumes sent to the LLM in one batched evaluation call
+EVALUATION_BATCH_SIZE = int(os.getenv('EVALUATION_BATCH_SIZE', 5))
+
+# Upper bound on application ids accepted by one /api/evaluate/batch request
+EVALUATION_BATCH_MAX_IDS = int(os.getenv('EVALUATION_BATCH_MAX_IDS', 50))
+
+# Columns the evaluation pipeline reads; avoids pulling whole rows
+EVALUATION_APPLICATION_COLUMNS = 'id, student_id, job_id, resume_url, resume_text'
+EVALUATION_JOB_COLUMNS = 'id, title, description, requirements'
+
+# Exact-match cache of LLM responses, keyed on the full request fingerprint
+LLM_CACHE_TTL = 7 * 24 * 3600
+llm_cache = TTLCache(maxsize=int(os.getenv('LLM_CACHE_SIZE', 1024)), ttl=LLM_CACHE_TTL)
+llm_cache_lock = threading.Lock()
+
+# NL-to-SQL translations, keyed on the normalised question
+SQL_CACHE_TTL = 24 * 3600
+sql_cache = TTLCache(maxsize=int(os.getenv('SQL_CACHE_SIZE', 1024)), ttl=SQL_CACHE_TTL)
+sql_cache_lock = threading.Lock()
+
+# Signed storage URLs, reused until shortly before they expire; keys are (bucket, path, expires_in)
+SIGNED_URL_EXPIRY_MARGIN = 60
+signed_url_cache = TLRUCache(
+    maxsize=int(os.getenv('SIGNED_URL_CACHE_SIZE', 10000)),
+    ttu=lambda key, url, now: now + key[2] - SIGNED_URL_EXPIRY_MARGIN
+)
+signed_url_cache_lock = threading.Lock()
 
 # SMTP Configuration
 SMTP_HOST = os.getenv('SMTP_HOST')
@@ -67,46 +120,267 @@ SMTP_PORT = int(os.getenv('SMTP_PORT', 587))
 SMTP_USER = os.getenv('SMTP_USER')
 SMTP_PASS = os.getenv('SMTP_PASS')
 
+# Logged-in SMTP connection reused across emails; smtplib is not thread-safe
+smtp_connection = None
+smtp_lock = threading.Lock()
+
+# Shared pool for running independent Supabase round-trips concurrently
+io_executor = ThreadPoolExecutor(max_workers=int(os.getenv('IO_WORKERS', 16)))
+
+# Background AI evaluation: an RQ queue when Redis is configured, otherwise an in-process pool.
+# Run queued jobs with: rq worker --url $REDIS_URL evaluations
+# The in-process pool is not durable: evaluations still running when a worker restarts stay 'pending'
+# until re-triggered through /api/evaluate, so set REDIS_URL wherever that matters
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    from redis import Redis
+    from rq import Queue
+    evaluation_queue = Queue('evaluations', connection=Redis.from_url(REDIS_URL))
+else:
+    evaluation_queue = None
+
+# Kept separate from io_executor, which evaluations themselves submit work to
+evaluation_executor = ThreadPoolExecutor(max_workers=int(os.getenv('EVALUATION_WORKERS', 4)))
+
+# Serverless platforms freeze the process after the response, so background threads would lose work;
+# without a queue there, evaluations run inline before the response instead
+EVALUATION_INLINE = os.getenv('EVALUATION_INLINE', '1' if os.getenv('VERCEL') else '0') == '1'
+
+# =============================================================================
+# LLM PROMPTS
+# =============================================================================
+
+# System prompts are fully static so every request shares a cacheable prefix;
+# only the user message carries per-request data.
+ANALYSIS_SYSTEM_PROMPT = """You are an expert HR analyst. Analyze resumes against job requirements and provide structured JSON output.
+
+Analyze the resume in the user message against the job requirements and provide a comprehensive evaluation in the following JSON format:
+{
+    "skills": ["skill1", "skill2", "skill3"],
+    "key_projects": ["project1", "project2", "project3"],
+    "certifications": ["cert1", "cert2"],
+    "experience": "X years of experience",
+    "summary": "Brief 2-3 line summary of the candidate",
+    "relevance_score": 85,
+    "verdict": "High",
+    "strong_points": ["point1", "point2", "point3"],
+    "weak_points": ["point1", "point2", "point3"]
+}
+
+Guidelines:
+- be useful and helpful, critically analyse the resume and the job requirements
+- be very critical and harsh in your analysis and giving relevance score
+- if you find skill mismatch/low/lower than expected experience/bad projects cgpa reduce points significantly
+- relevance_score: 0-100 based on overall match
+- verdict: "High" (75+), "Medium" (50-74), "Low" (<50)
+- Extract actual skills, projects, certifications from resume
+- Provide specific strong/weak points based on job requirements
+- Be objective and professional in analysis
+
+Return only valid JSON, no additional text."""
+
+# Appended to the analysis prompt so single and batched calls share a prefix
+ANALYSIS_BATCH_SYSTEM_PROMPT = ANALYSIS_SYSTEM_PROMPT + """
+
+When the user message is a JSON array of applications, each with "id", "job_title", "job_description" and "resume", evaluate every application independently.
+Return a JSON object of the form {"results": [...]} containing one evaluation object per application, in the format above plus its "id"."""
+
+ANALYSIS_USER_TEMPLATE = """Job Title: {title}
+Job Description: {description}
+
+Resume Text: {resume}"""
+
+SQL_SYSTEM_PROMPT = """You are an expert SQL developer. Translate the natural language query in the user message to SQL for a hiring portal database.
+
+Available tables and columns:
+- students: id, user_id, full_name, email, phone, college, created_at
+- jobs: id, title, company, location, type, level, salary, description, requirements, benefits, deadline, status, posted_date, created_by, created_at
+- applications: id, student_id, job_id, resume_url, relevance_score, verdict, strong_points, weak_points, skills, key_projects, certifications, experience, summary, college, applied_for, created_at
+
+Rules:
+1. Only SELECT statements allowed
+2. No mutations (INSERT, UPDATE, DELETE)
+3. No dangerous keywords (DROP, ALTER, etc.)
+4. Single statement only
+5. dont use join statements
+6. Respond only with a JSON object of the form {"sql": "<the SQL query>"}"""
+
+SQL_USER_TEMPLATE = 'Query: "{query}"'
+
+# Guards for generated SQL, compiled once instead of rescanning per keyword
+DANGEROUS_SQL_RE = re.compile(r'\b(DROP|DELETE|INSERT|UPDATE|ALTER|CREATE|TRUNCATE|GRANT|REVOKE)\b', re.IGNORECASE)
+ALLOWED_TABLES = {'STUDENTS', 'JOBS', 'APPLICATIONS'}
+
+# Relation checking works on a token stream with string literals blanked out
+SQL_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+SQL_TOKEN_RE = re.compile(r'\w+|\S')
+SQL_WORD_RE = re.compile(r'^[A-Z_]\w*$')
+# Quoted identifiers, dollar quotes, stray quotes, comments and statement separators are never needed
+SQL_UNSAFE_SYNTAX_RE = re.compile(r'["$;\']|--|/\*')
+# Only these unqualified functions may be called from generated SQL
+SQL_ALLOWED_FUNCTIONS = {
+    'COUNT', 'SUM', 'AVG', 'MIN', 'MAX', 'STDDEV', 'BOOL_AND', 'BOOL_OR', 'ARRAY_AGG', 'STRING_AGG',
+    'ROW_NUMBER', 'RANK', 'DENSE_RANK', 'ROUND', 'CEIL', 'FLOOR', 'ABS', 'COALESCE', 'NULLIF',
+    'GREATEST', 'LEAST', 'CAST', 'LOWER', 'UPPER', 'INITCAP', 'LENGTH', 'CHAR_LENGTH', 'TRIM',
+    'LTRIM', 'RTRIM', 'SUBSTRING', 'SUBSTR', 'POSITION', 'CONCAT', 'REPLACE', 'SPLIT_PART', 'LEFT',
+    'RIGHT', 'EXTRACT', 'DATE_PART', 'DATE_TRUNC', 'NOW', 'AGE', 'TO_CHAR', 'TO_DATE', 'ARRAY_LENGTH',
+    'CARDINALITY', 'UNNEST', 'ARRAY_TO_STRING'
+}
+# Functions whose argument syntax uses FROM without naming a relation
+SQL_FROM_SYNTAX_FUNCTIONS = {'EXTRACT', 'SUBSTRING', 'TRIM', 'POSITION'}
+# Keywords a '(' may follow without being a function call; the parentheses hold a subquery or expression
+SQL_PAREN_KEYWORDS = {
+    'SELECT', 'FROM', 'JOIN', 'ON', 'USING', 'WHERE', 'AND', 'OR', 'NOT', 'IN', 'EXISTS', 'ANY', 'ALL',
+    'SOME', 'HAVING', 'BY', 'GROUP', 'WHEN', 'THEN', 'ELSE', 'CASE', 'OVER', 'FILTER', 'DISTINCT',
+    'BETWEEN', 'IS', 'LIKE', 'ILIKE', 'UNION', 'INTERSECT', 'EXCEPT', 'ARRAY', 'ROW', 'LIMIT', 'OFFSET'
+}
+# Keywords that read relations without FROM, or define them inline
+SQL_DENIED_KEYWORDS = {'TABLE', 'VALUES', 'WITH'}
+# Keywords that end a FROM list at the same nesting level
+SQL_FROM_END_KEYWORDS = {
+    'WHERE', 'GROUP', 'HAVING', 'ORDER', 'LIMIT', 'OFFSET', 'FETCH', 'FOR',
+    'WINDOW', 'UNION', 'INTERSECT', 'EXCEPT'
+}
+
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
 
-def supabase_upload(file_bytes: bytes, path: str, bucket: str = 'resume') -> str:
-    """Upload file to Supabase storage bucket"""
+class StreamReader(io.RawIOBase):
+    """Raw adapter so any readable binary stream can sit under io.BufferedReader"""
+    
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        data = self.stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+def supabase_upload(file: Union[bytes, BinaryIO], path: str, bucket: str = 'resume') -> str:
+    """Upload file bytes or a binary stream to Supabase storage bucket"""
     try:
-        result = supabase.storage.from_(bucket).upload(path, file_bytes)
+        # storage3 streams BufferedReader bodies in chunks (anything else is treated as a path);
+        # SpooledTemporaryFile only gained readable() in Python 3.11, so wrap it via StreamReader
+        if not isinstance(file, bytes):
+            file = io.BufferedReader(StreamReader(file))
+        
+        result = supabase.storage.from_(bucket).upload(path, file)
         if hasattr(result, 'error') and result.error:
             raise Exception(f"Upload failed: {result.error}")
         return path
     except Exception as e:
         raise Exception(f"Failed to upload file: {str(e)}")
 
+def discard_upload(upload_future: Future, path: str, bucket: str = 'resume') -> None:
+    """Wait for an in-flight upload and remove the file when the record it belongs to was not created"""
+    try:
+        upload_future.result()
+    except Exception:
+        # The upload itself failed, so nothing was stored
+        return
+    
+    try:
+        supabase.storage.from_(bucket).remove([path])
+    except Exception as e:
+        print(f"Error removing orphaned upload {path}: {e}")
+
 def supabase_signed_url(path: str, expires_in: int = 3600, bucket: str = 'resume') -> str:
     """Generate signed URL for file access"""
+    cache_key = (bucket, path, expires_in)
+    with signed_url_cache_lock:
+        signed_url = signed_url_cache.get(cache_key)
+    
+    if signed_url is not None:
+        return signed_url
+    
     try:
         result = supabase.storage.from_(bucket).create_signed_url(path, expires_in)
         if hasattr(result, 'error') and result.error:
             raise Exception(f"Failed to create signed URL: {result.error}")
+        
+        with signed_url_cache_lock:
+            signed_url_cache[cache_key] = result['signedURL']
         return result['signedURL']
     except Exception as e:
         raise Exception(f"Failed to generate signed URL: {str(e)}")
 
+def supabase_signed_urls(paths: List[str], expires_in: int = 3600, bucket: str = 'resume') -> Dict[str, str]:
+    """Generate signed URLs for many files, signing cache misses in a single request"""
+    signed_urls = {}
+    with signed_url_cache_lock:
+        for path in paths:
+            signed_url = signed_url_cache.get((bucket, path, expires_in))
+            if signed_url is not None:
+                signed_urls[path] = signed_url
+    
+    missing = list(dict.fromkeys(path for path in paths if path not in signed_urls))
+    if not missing:
+        return signed_urls
+    
+    try:
+        results = supabase.storage.from_(bucket).create_signed_urls(missing, expires_in)
+    except Exception as e:
+        raise Exception(f"Failed to generate signed URLs: {str(e)}")
+    
+    # Paths that failed to sign are left out of the result
+    with signed_url_cache_lock:
+        for item in results:
+            if item.get('error') or not item.get('signedURL'):
+                continue
+            signed_urls[item['path']] = item['signedURL']
+            signed_url_cache[(bucket, item['path'], expires_in)] = item['signedURL']
+    return signed_urls
+
+def llm_cache_key(model: str, temperature: float, messages: List[Dict[str, str]]) -> str:
+    """Hash everything that determines an LLM completion into a cache key"""
+    payload = json.dumps([model, temperature, messages], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
 def extract_text(file_bytes: bytes, filename: str) -> str:
     """Extract text from PDF or DOCX files"""
+    # Parsers are imported on first use so workers that never parse resumes don't load them
     try:
         if filename.lower().endswith('.pdf'):
+            import pymupdf
+            
+            # PyMuPDF's C extractor is far faster than pdfplumber's layout analysis
+            doc = pymupdf.open(stream=file_bytes, filetype="pdf")
+            try:
+                if doc.page_count:
+                    pages = []
+                    length = 0
+                    # Pages are loaded lazily, so stop once the prompt budget is covered
+                    for page in doc:
+                        pages.append(page.get_text("text"))
+                        length += len(pages[-1])
+                        if length >= RESUME_EXTRACT_LIMIT:
+                            break
+                    return "\n".join(pages).strip()
+            finally:
+                doc.close()
+            
+            # Fall back to pdfplumber if PyMuPDF could not see any pages
+            import pdfplumber
+            
             with pdfplumber.open(io.BytesIO(file_bytes)) as pdf:
-                text = ""
+                pages = []
+                length = 0
                 for page in pdf.pages:
-                    text += page.extract_text() or ""
-                return text.strip()
+                    pages.append(page.extract_text() or "")
+                    length += len(pages[-1])
+                    if length >= RESUME_EXTRACT_LIMIT:
+                        break
+                return "\n".join(pages).strip()
         
         elif filename.lower().endswith(('.docx', '.doc')):
+            from docx import Document
+            
             doc = Document(io.BytesIO(file_bytes))
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            return text.strip()
+            return "\n".join(paragraph.text for paragraph in doc.paragraphs).strip()
         
         else:
             raise ValueError("Unsupported file format. Please upload PDF or DOCX files.")
@@ -114,11 +388,75 @@ def extract_text(file_bytes: bytes, filename: str) -> str:
     except Exception as e:
         raise Exception(f"Failed to extract text from file: {str(e)}")
 
+def job_requirements_text(job: Dict[str, Any]) -> str:
+    """Combine the job description and requirements for the analysis prompt"""
+    return (job.get('description') or '') + ' ' + (job.get('requirements') or '')
+
+def analysis_messages(job: Dict[str, Any], resume_text: str) -> List[Dict[str, str]]:
+    """Build the chat messages for analysing one resume against a job"""
+    # Static instructions go first so the provider can cache the prompt prefix
+    return [
+        {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+        {"role": "user", "content": ANALYSIS_USER_TEMPLATE.format(
+            title=job.get('title', ''),
+            description=job_requirements_text(job)[:JOB_DESCRIPTION_LIMIT],
+            resume=resume_text[:RESUME_TEXT_LIMIT]
+        )}
+    ]
+
+def has_analysis_context(job: Dict[str, Any], resume_text: str) -> bool:
+    """Check the job and resume carry enough text to be worth analysing"""
+    return bool(job.get('description')) and len((resume_text or '').strip()) >= MIN_RESUME_TEXT_LENGTH
+
+def fallback_analysis() -> Dict[str, Any]:
+    """Neutral analysis used when the LLM output cannot be parsed"""
+    return {
+        "skills": [],
+        "key_projects": [],
+        "certifications": [],
+        "experience": "Unknown",
+        "summary": "Unable to analyze resume",
+        "relevance_score": 50,
+        "verdict": "Medium",
+        "strong_points": ["Resume submitted"],
+        "weak_points": ["Unable to analyze"]
+    }
+
+def save_analysis(application: Dict[str, Any], job: Dict[str, Any], analysis_data: Dict[str, Any], resume_text: str = None) -> Dict[str, Any]:
+    """Store AI analysis on the application and return the evaluation summary"""
+    update_data = {
+        'student_id': application['student_id'],
+        'relevance_score': int(analysis_data.get('relevance_score', 50)),
+        'verdict': analysis_data.get('verdict', 'Medium'),
+        'strong_points': analysis_data.get('strong_points', []),
+        'weak_points': analysis_data.get('weak_points', []),
+        'skills': analysis_data.get('skills', []),
+        'key_projects': analysis_data.get('key_projects', []),
+        'certifications': analysis_data.get('certifications', []),
+        'experience': analysis_data.get('experience', ''),
+        'summary': analysis_data.get('summary', ''),
+        'applied_for': job.get('title', ''),
+        'evaluation_status': 'completed',
+        'evaluation_error': None
+    }
+    
+    # Store freshly extracted text so re-evaluations skip the download and parse
+    if resume_text and resume_text != application.get('resume_text'):
+        update_data['resume_text'] = resume_text
+    
+    supabase.table('applications').update(update_data).eq('id', application['id']).execute()
+    
+    return {
+        'ok': True,
+        'relevance_score': analysis_data.get('relevance_score', 50),
+        'verdict': analysis_data.get('verdict', 'Medium')
+    }
+
 def evaluate_application(application_id: str, resume_text: str = None) -> Dict[str, Any]:
     """Run AI evaluation pipeline on application"""
     try:
         # Fetch application data
-        app_result = supabase.table('applications').select('*').eq('id', application_id).execute()
+        app_result = supabase.table('applications').select(EVALUATION_APPLICATION_COLUMNS).eq('id', application_id).limit(1).execute()
         
 
         if not app_result.data:
@@ -126,172 +464,292 @@ def evaluate_application(application_id: str, resume_text: str = None) -> Dict[s
         
         application = app_result.data[0]
         
-        # Fetch related job and student data separately
-        job = {}
-        student = {}
+        # Fetch related job and resume concurrently
+        job_future = None
+        resume_future = None
         
         if application.get('job_id'):
-            job_result = supabase.table('jobs').select('*').eq('id', application['job_id']).execute()
-            job = job_result.data[0] if job_result.data else {}
-        
-        if application.get('student_id'):
-            student_result = supabase.table('students').select('*').eq('id', application['student_id']).execute()
-            student = student_result.data[0] if student_result.data else {}
+            job_future = io_executor.submit(
+                lambda: supabase.table('jobs').select(EVALUATION_JOB_COLUMNS).eq('id', application['job_id']).limit(1).execute()
+            )
         
-        # Use provided resume text or extract from Supabase if not provided
+        # Use provided resume text, then previously extracted text, and only download as a last resort
+        resume_text = resume_text or application.get('resume_text')
         if not resume_text:
             resume_path = application['resume_url']
-            resume_bytes = supabase.storage.from_('resumes').download(resume_path)
-            resume_text = extract_text(resume_bytes, resume_path)
-        
-        # Parse job requirements
-        job_requirements = job.get('description', '') + ' ' + job.get('requirements', '')
-        
-        # Use LLM to analyze resume and job match
-        analysis_prompt = f"""
-        Analyze this resume against the job requirements and provide a comprehensive evaluation in JSON format.
-        
-        Job Title: {job.get('title', '')}
-        Job Description: {job_requirements[:2000]}
-        
-        Resume Text: {resume_text[:3000]}
-        
-        Please provide a detailed analysis in the following JSON format:
-        {{
-            "skills": ["skill1", "skill2", "skill3"],
-            "key_projects": ["project1", "project2", "project3"],
-            "certifications": ["cert1", "cert2"],
-            "experience": "X years of experience",
-            "summary": "Brief 2-3 line summary of the candidate",
-            "relevance_score": 85,
-            "verdict": "High",
-            "strong_points": ["point1", "point2", "point3"],
-            "weak_points": ["point1", "point2", "point3"]
-        }}
-        
-        Guidelines:
-        - be useful and helpful, critically analyse the resume and the job requirements
-        - be very critical and harsh in your analysis and giving relevance score
-        - if you find skill mismatch/low/lower than expected experience/bad projects cgpa reduce points significantly
-        - relevance_score: 0-100 based on overall match
-        - verdict: "High" (75+), "Medium" (50-74), "Low" (<50)
-        - Extract actual skills, projects, certifications from resume
-        - Provide specific strong/weak points based on job requirements
-        - Be objective and professional in analysis
-        
-        Return only valid JSON, no additional text.
-        """
+            resume_future = io_executor.submit(supabase.storage.from_('resumes').download, resume_path)
         
-        # Use Groq client for LLM analysis
-        if groq_client:
+        job = {}
+        
+        if job_future:
+            job_result = job_future.result()
+            job = job_result.data[0] if job_result.data else {}
+        
+        if resume_future:
+            resume_text = extract_text(resume_future.result(), resume_path)
+        
+        # Degenerate input would only produce the fallback, so skip the LLM call
+        if not has_analysis_context(job, resume_text):
+            return save_analysis(application, job, fallback_analysis(), resume_text)
+        
+        messages = analysis_messages(job, resume_text)
+        
+        # Reuse a previous analysis of the same resume against the same job
+        cache_key = llm_cache_key(ANALYSIS_MODEL, ANALYSIS_TEMPERATURE, messages)
+        with llm_cache_lock:
+            analysis_data = llm_cache.get(cache_key)
+        
+        if analysis_data is None:
+            # Use Groq client for LLM analysis
+            if groq_client:
+            
+                response = groq_client.chat.completions.create(
+                    model=ANALYSIS_MODEL,
+                    messages=messages,
+                    temperature=ANALYSIS_TEMPERATURE,
+                    response_format={"type": "json_object"}
+                )
+                analysis_text = response.choices[0].message.content.strip()
+            else:
+                raise Exception("LLM client not available")
+            
+            # Parse LLM response (JSON mode guarantees an object; this stays defensive)
+            try:
+                analysis_data = json.loads(analysis_text)
+                
+                with llm_cache_lock:
+                    llm_cache[cache_key] = analysis_data
+            except json.JSONDecodeError as e:
+                # Fallback parsing if JSON is malformed
+                print(f"JSON parsing error: {e}")
+                print(f"Raw response: {analysis_text}")
+                analysis_data = fallback_analysis()
+        
+        # Update application with AI analysis
+        return save_analysis(application, job, analysis_data, resume_text)
+        
+    except Exception as e:
+        print(f"Error in evaluate_application: {str(e)}")
+        # Record the failure so clients polling the application stop waiting
+        try:
+            set_evaluation_status(application_id, 'failed', str(e))
+        except Exception as status_error:
+            print(f"Error recording evaluation failure: {str(status_error)}")
+        return {
+            'ok': False,
+            'error': str(e)
+        }
+
+def set_evaluation_status(application_id: str, status: str, error: str = None) -> None:
+    """Record where an application's AI evaluation stands ('pending', 'completed' or 'failed')"""
+    supabase.table('applications').update({
+        'evaluation_status': status,
+        'evaluation_error': error
+    }).eq('id', application_id).execute()
+
+def run_evaluation(application_id: str, resume_text: str = None) -> Dict[str, Any]:
+    """Background entry point for evaluate_application; raises on failure so RQ marks the job failed"""
+    result = evaluate_application(application_id, resume_text)
+    if not result.get('ok'):
+        raise Exception(result.get('error', 'Evaluation failed'))
+    return result
+
+def enqueue_evaluation(application_id: str, resume_text: str = None) -> Optional[str]:
+    """Run evaluate_application in the background; returns the final evaluation_status if it ran inline"""
+    if evaluation_queue is not None:
+        evaluation_queue.enqueue(run_evaluation, application_id, resume_text)
+    elif EVALUATION_INLINE:
+        result = evaluate_application(application_id, resume_text)
+        return 'completed' if result.get('ok') else 'failed'
+    else:
+        evaluation_executor.submit(run_evaluation, application_id, resume_text)
+    return None
+
+def evaluate_applications_batch(application_ids: List[str]) -> Dict[str, Any]:
+    """Run AI evaluation on several applications, sharing one LLM call per batch"""
+    results = {application_id: {'ok': False, 'error': 'Application not found'} for application_id in application_ids}
+    
+    try:
+        if not groq_client:
+            raise Exception("LLM client not available")
+        
+        # Fetch all applications and their jobs in one round-trip each
+        app_result = supabase.table('applications').select(EVALUATION_APPLICATION_COLUMNS).in_('id', application_ids).execute()
+        applications = app_result.data or []
+        
+        jobs = {}
+        job_ids = list({application['job_id'] for application in applications if application.get('job_id')})
+        if job_ids:
+            job_result = supabase.table('jobs').select(EVALUATION_JOB_COLUMNS).in_('id', job_ids).execute()
+            jobs = {job['id']: job for job in job_result.data}
+        
+        # Download resumes without previously extracted text concurrently
+        resume_futures = {
+            application['id']: io_executor.submit(supabase.storage.from_('resumes').download, application['resume_url'])
+            for application in applications if application.get('resume_url') and not application.get('resume_text')
+        }
         
+        # Resolve cached analyses and collect the rest for the LLM
+        pending = []
+        for application in applications:
+            job = jobs.get(application.get('job_id'), {})
+            
+            try:
+                resume_text = application.get('resume_text')
+                if not resume_text:
+                    if application['id'] not in resume_futures:
+                        raise Exception("Resume not found")
+                    resume_text = extract_text(resume_futures[application['id']].result(), application['resume_url'])
+            except Exception as e:
+                results[application['id']] = {'ok': False, 'error': str(e)}
+                continue
+            
+            if not has_analysis_context(job, resume_text):
+                results[application['id']] = save_analysis(application, job, fallback_analysis(), resume_text)
+                continue
+            
+            # Keyed on the batch prompt and this resume's entry, apart from single-application results
+            batch_item = {
+                'job_title': job.get('title', ''),
+                'job_description': job_requirements_text(job)[:JOB_DESCRIPTION_LIMIT],
+                'resume': resume_text[:RESUME_TEXT_LIMIT]
+            }
+            cache_key = llm_cache_key(ANALYSIS_MODEL, ANALYSIS_TEMPERATURE, [
+                {"role": "system", "content": ANALYSIS_BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps(batch_item, sort_keys=True)}
+            ])
+            with llm_cache_lock:
+                analysis_data = llm_cache.get(cache_key)
+            
+            if analysis_data is not None:
+                results[application['id']] = save_analysis(application, job, analysis_data, resume_text)
+            else:
+                pending.append((application, job, resume_text, batch_item, cache_key))
+        
+        for start in range(0, len(pending), EVALUATION_BATCH_SIZE):
+            batch = pending[start:start + EVALUATION_BATCH_SIZE]
+            batch_input = [{'id': application['id'], **batch_item} for application, _, _, batch_item, _ in batch]
+            
             response = groq_client.chat.completions.create(
-                model="llama-3.1-8b-instant",
+                model=ANALYSIS_MODEL,
                 messages=[
-                    {"role": "system", "content": "You are an expert HR analyst. Analyze resumes against job requirements and provide structured JSON output."},
-                    {"role": "user", "content": analysis_prompt}
+                    {"role": "system", "content": ANALYSIS_BATCH_SYSTEM_PROMPT},
+                    {"role": "user", "content": json.dumps(batch_input)}
                 ],
-                temperature=0.1
+                temperature=ANALYSIS_TEMPERATURE,
+                response_format={"type": "json_object"}
             )
             analysis_text = response.choices[0].message.content.strip()
-        else:
-            raise Exception("LLM client not available")
-        
-        # Parse LLM response
-        try:
-            # Clean up the response to extract JSON
-            analysis_text = analysis_text.replace('```json', '').replace('```', '').strip()
-            analysis_data = json.loads(analysis_text)
-        except json.JSONDecodeError as e:
-            # Fallback parsing if JSON is malformed
-            print(f"JSON parsing error: {e}")
-            print(f"Raw response: {analysis_text}")
-            analysis_data = {
-                "skills": [],
-                "key_projects": [],
-                "certifications": [],
-                "experience": "Unknown",
-                "summary": "Unable to analyze resume",
-                "relevance_score": 50,
-                "verdict": "Medium",
-                "strong_points": ["Resume submitted"],
-                "weak_points": ["Unable to analyze"]
-            }
-        
-        # Update application with AI analysis
-        update_data = {
-            'student_id': application['student_id'],
-            'relevance_score': int(analysis_data.get('relevance_score', 50)),
-            'verdict': analysis_data.get('verdict', 'Medium'),
-            'strong_points': analysis_data.get('strong_points', []),
-            'weak_points': analysis_data.get('weak_points', []),
-            'skills': analysis_data.get('skills', []),
-            'key_projects': analysis_data.get('key_projects', []),
-            'certifications': analysis_data.get('certifications', []),
-            'experience': analysis_data.get('experience', ''),
-            'summary': analysis_data.get('summary', ''),
-            'applied_for': job.get('title', '')
-        }
-        print(update_data)
-        supabase.table('applications').update(update_data).eq('id', application_id).execute()
+            
+            # Parse LLM response
+            try:
+                batch_results = {item.get('id'): item for item in json.loads(analysis_text).get('results', [])}
+            except (json.JSONDecodeError, AttributeError) as e:
+                print(f"JSON parsing error: {e}")
+                print(f"Raw response: {analysis_text}")
+                batch_results = {}
+            
+            for application, job, resume_text, _, cache_key in batch:
+                analysis_data = batch_results.get(application['id'])
+                
+                if analysis_data is None:
+                    # The model skipped this resume; evaluate it on its own rather than saving a fallback
+                    results[application['id']] = evaluate_application(application['id'], resume_text)
+                    continue
+                
+                with llm_cache_lock:
+                    llm_cache[cache_key] = analysis_data
+                
+                try:
+                    results[application['id']] = save_analysis(application, job, analysis_data, resume_text)
+                except Exception as e:
+                    results[application['id']] = {'ok': False, 'error': str(e)}
         
         return {
             'ok': True,
-            'relevance_score': analysis_data.get('relevance_score', 50),
-            'verdict': analysis_data.get('verdict', 'Medium')
+            'results': results
         }
         
     except Exception as e:
-        print(f"Error in evaluate_application: {str(e)}")
+        print(f"Error in evaluate_applications_batch: {str(e)}")
+        # Applications not evaluated before the error share its message
+        for application_id, result in results.items():
+            if not result.get('ok'):
+                results[application_id] = {'ok': False, 'error': str(e)}
         return {
             'ok': False,
-            'error': str(e)
+            'error': str(e),
+            'results': results
+        }
+    
+    finally:
+        # Record failures so clients polling the applications stop waiting
+        for application_id, result in results.items():
+            if not result.get('ok'):
+                try:
+                    set_evaluation_status(application_id, 'failed', result.get('error'))
+                except Exception as status_error:
+                    print(f"Error recording evaluation failure: {str(status_error)}")
+
+def run_evaluation_batch(application_ids: List[str]) -> Dict[str, Any]:
+    """Background entry point for evaluate_applications_batch; raises if any application failed"""
+    result = evaluate_applications_batch(application_ids)
+    failed = [application_id for application_id, item in result.get('results', {}).items() if not item.get('ok')]
+    if not result.get('ok') or failed:
+        raise Exception(result.get('error') or f"Evaluation failed for {', '.join(failed)}")
+    return result
+
+def enqueue_evaluation_batch(application_ids: List[str]) -> Optional[Dict[str, str]]:
+    """Run evaluate_applications_batch in the background; returns each final evaluation_status if it ran inline"""
+    if evaluation_queue is not None:
+        evaluation_queue.enqueue(run_evaluation_batch, application_ids)
+    elif EVALUATION_INLINE:
+        results = evaluate_applications_batch(application_ids).get('results', {})
+        return {
+            application_id: 'completed' if results.get(application_id, {}).get('ok') else 'failed'
+            for application_id in application_ids
         }
+    else:
+        evaluation_executor.submit(run_evaluation_batch, application_ids)
+    return None
 
 def translate_to_sql(nl_query: str) -> Dict[str, Any]:
     """Translate natural language to SQL using LLM"""
     try:
-        prompt = f"""
-        Translate this natural language query to SQL for a hiring portal database.
-        
-        Query: "{nl_query}"
-        
-        Available tables and columns:
-        - students: id, user_id, full_name, email, phone, college, created_at
-        - jobs: id, title, company, location, type, level, salary, description, requirements, benefits, deadline, status, posted_date, created_by, created_at
-        - applications: id, student_id, job_id, resume_url, relevance_score, verdict, strong_points, weak_points, skills, key_projects, certifications, experience, summary, college, applied_for, created_at
-        
-        Rules:
-        1. Only SELECT statements allowed
-        2. No mutations (INSERT, UPDATE, DELETE)
-        3. No dangerous keywords (DROP, ALTER, etc.)
-        4. Single statement only
-        5. Return only the SQL query
-        6. dont use join statements
-        7. dont send any additional text just the sql query
-        
-        SQL Query:
-        """
+        # Dashboards repeat the same questions; the key covers the schema prompt and model too
+        normalized_query = ' '.join(nl_query.lower().split())
+        cache_key = llm_cache_key(SQL_MODEL, 0.1, [
+            {"role": "system", "content": SQL_SYSTEM_PROMPT},
+            {"role": "user", "content": SQL_USER_TEMPLATE.format(query=normalized_query)}
+        ])
+        with sql_cache_lock:
+            cached_sql = sql_cache.get(cache_key)
+        
+        if cached_sql is not None:
+            return {
+                'ok': True,
+                'sql': cached_sql
+            }
         
         # Use Groq client for LLM analysis
         if groq_client:
-        
-
             response = groq_client.chat.completions.create(
-                model="llama-3.1-8b-instant",
+                model=SQL_MODEL,
                 messages=[
-                    {"role": "system", "content": "You are an expert SQL developer. Translate this natural language query to SQL for a hiring portal database."},
-                    {"role": "user", "content": prompt}
+                    {"role": "system", "content": SQL_SYSTEM_PROMPT},
+                    {"role": "user", "content": SQL_USER_TEMPLATE.format(query=nl_query)}
                 ],
-                temperature=0.1
+                temperature=0.1,
+                response_format={"type": "json_object"}
             )
             llm_response = response.choices[0].message.content.strip()
         else:
             raise Exception("LLM client not available")
 
-
-        sql_query = llm_response.strip()
-        print(sql_query)
+        try:
+            sql_query = str(json.loads(llm_response).get('sql', '')).strip()
+        except (json.JSONDecodeError, AttributeError):
+            raise Exception("LLM returned an invalid SQL response")
         
         # Basic validation
         sql_query = sql_query.replace('```sql', '').replace('```', '').strip()
@@ -299,10 +757,12 @@ def translate_to_sql(nl_query: str) -> Dict[str, Any]:
         if not sql_query.upper().startswith('SELECT'):
             raise Exception("Only SELECT statements are allowed")
         
-        dangerous_keywords = ['DROP', 'DELETE', 'INSERT', 'UPDATE', 'ALTER', 'CREATE', 'TRUNCATE']
-        if any(keyword in sql_query.upper() for keyword in dangerous_keywords):
+        if DANGEROUS_SQL_RE.search(sql_query):
             raise Exception("Dangerous SQL keywords detected")
         
+        with sql_cache_lock:
+            sql_cache[cache_key] = sql_query
+        
         return {
             'ok': True,
             'sql': sql_query
@@ -314,35 +774,96 @@ def translate_to_sql(nl_query: str) -> Dict[str, Any]:
             'error': str(e)
         }
 
+def check_sql_relations(sql_query: str) -> None:
+    """Raise unless every relation the query reads from is one of ALLOWED_TABLES"""
+    # Backslash escapes (E'...' strings) would let a literal end where the regex doesn't expect
+    if '\\' in sql_query:
+        raise Exception("Backslash escapes are not allowed")
+    
+    stripped = SQL_STRING_LITERAL_RE.sub('0', sql_query.strip().rstrip(';'))
+    if SQL_UNSAFE_SYNTAX_RE.search(stripped):
+        raise Exception("Quoted identifiers, comments and multiple statements are not allowed")
+    
+    tokens = [token.upper() for token in SQL_TOKEN_RE.findall(stripped)]
+    if not tokens or tokens[0] != 'SELECT':
+        raise Exception("Only SELECT statements are allowed")
+    
+    # One entry per parenthesis level: does FROM name relations there, and are we inside a FROM list
+    levels = [{'relations': True, 'from': False}]
+    expect_relation = False
+    relations = 0
+    
+    for i, token in enumerate(tokens):
+        previous_token = tokens[i - 1] if i else None
+        next_token = tokens[i + 1] if i + 1 < len(tokens) else None
+        
+        if token in SQL_DENIED_KEYWORDS:
+            raise Exception(f"{token} is not allowed")
+        
+        if expect_relation:
+            # Every FROM item is an allowed table or a parenthesised subquery
+            expect_relation = False
+            if token == '(':
+                if next_token != 'SELECT':
+                    raise Exception("Query must reference allowed tables only")
+            elif token in ALLOWED_TABLES and next_token not in ('.', '('):
+                relations += 1
+                continue
+            else:
+                raise Exception("Query must reference allowed tables only")
+        
+        level = levels[-1]
+        if token == '(':
+            if previous_token and SQL_WORD_RE.match(previous_token) and previous_token not in SQL_PAREN_KEYWORDS:
+                # Function call: unqualified and on the allowlist
+                if i > 1 and tokens[i - 2] == '.':
+                    raise Exception("Schema-qualified functions are not allowed")
+                if previous_token not in SQL_ALLOWED_FUNCTIONS:
+                    raise Exception(f"Function {previous_token.lower()} is not allowed")
+                levels.append({'relations': previous_token not in SQL_FROM_SYNTAX_FUNCTIONS, 'from': False})
+            else:
+                # Subquery or expression group; its contents are checked like the outer query
+                levels.append({'relations': True, 'from': False})
+        elif token == ')':
+            if len(levels) == 1:
+                raise Exception("Unbalanced parentheses in query")
+            levels.pop()
+        elif not level['relations']:
+            # FROM inside EXTRACT(YEAR FROM ...) and similar is not a relation
+            continue
+        elif token == 'FROM':
+            # IS [NOT] DISTINCT FROM is a comparison
+            if previous_token == 'DISTINCT':
+                continue
+            level['from'] = True
+            expect_relation = True
+        elif token in SQL_FROM_END_KEYWORDS:
+            level['from'] = False
+        elif level['from'] and token in (',', 'JOIN'):
+            expect_relation = True
+    
+    if expect_relation or len(levels) != 1:
+        raise Exception("Incomplete query")
+    if not relations:
+        raise Exception("Query must reference allowed tables only")
+
 def validate_and_execute_sql(sql_query: str) -> Dict[str, Any]:
     """Validate and execute SQL query safely"""
     try:
         # Additional validation
-        allowed_tables = ['students', 'jobs', 'applications']
-        sql_upper = sql_query.upper()
+        if DANGEROUS_SQL_RE.search(sql_query):
+            raise Exception("Dangerous SQL keywords detected")
         
-        # Check if query contains only allowed tables
-        for table in allowed_tables:
-
-            if f'FROM {table.upper()}' in sql_upper or f'JOIN {table.upper()}' in sql_upper:
-                continue
-        else:
-            # If no allowed tables found, it might be a complex query
-            if not any(table in sql_upper for table in [t.upper() for t in allowed_tables]):
-                raise Exception("Query must reference allowed tables only")
+        # Check every relation is an allowed table, not another schema or a system catalog
+        check_sql_relations(sql_query)
         
         # Execute query using Supabase
         result = supabase.rpc('execute_sql', {'query': sql_query}).execute()
-        print(result)
-
         
         if result.data:
-            # Parse result
-            columns = list(result.data[0].keys()) if result.data else []
-            # rows = list(result.data[0].values()) if result.data else []
-            rows = [list(row.values()) for row in result.data]
-            print(rows)
-
+            # Parse result; map() keeps the per-row conversion in C for large result sets
+            columns = list(result.data[0].keys())
+            rows = list(map(list, map(dict.values, result.data)))
             
             return {
                 'ok': True,
@@ -362,26 +883,49 @@ def validate_and_execute_sql(sql_query: str) -> Dict[str, Any]:
             'error': f"SQL execution failed: {str(e)}"
         }
 
+def get_smtp_connection() -> smtplib.SMTP:
+    """Return the shared SMTP connection, connecting and logging in on first use"""
+    global smtp_connection
+    if smtp_connection is None:
+        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT, timeout=30)
+        server.starttls()
+        server.login(SMTP_USER, SMTP_PASS)
+        smtp_connection = server
+    return smtp_connection
+
+def reset_smtp_connection():
+    """Drop the shared SMTP connection so the next email reconnects"""
+    global smtp_connection
+    if smtp_connection is not None:
+        try:
+            smtp_connection.close()
+        except Exception:
+            pass
+    smtp_connection = None
+
 def send_email(to_email: str, subject: str, body: str, from_alias: str = "Hiring Portal") -> Dict[str, Any]:
     """Send email using SMTP"""
     try:
         if not all([SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS]):
             raise Exception("SMTP configuration missing")
         
-        msg = MIMEMultipart()
+        msg = EmailMessage()
         msg['From'] = f"{from_alias} <{SMTP_USER}>"
         msg['To'] = to_email
         msg['Subject'] = subject
+        msg.set_content(body, subtype='html')
         
-        msg.attach(MIMEText(body, 'html'))
-        
-        server = smtplib.SMTP(SMTP_HOST, SMTP_PORT)
-        server.starttls()
-        server.login(SMTP_USER, SMTP_PASS)
-        
-        text = msg.as_string()
-        server.sendmail(SMTP_USER, to_email, text)
-        server.quit()
+        with smtp_lock:
+            try:
+                get_smtp_connection().send_message(msg, SMTP_USER, to_email)
+            except smtplib.SMTPServerDisconnected:
+                # The server closed the idle connection; reconnect once and retry
+                reset_smtp_connection()
+                get_smtp_connection().send_message(msg, SMTP_USER, to_email)
+            except Exception:
+                # Don't reuse a connection left in an unknown state
+                reset_smtp_connection()
+                raise
         
         return {
             'ok': True,
@@ -394,6 +938,12 @@ def send_email(to_email: str, subject: str, body: str, from_alias: str = "Hiring
             'error': str(e)
         }
 
+@app.before_request
+def reject_oversized_uploads():
+    """Refuse bodies over MAX_CONTENT_LENGTH before any route starts reading them"""
+    if request.content_length is not None and request.content_length > app.config['MAX_CONTENT_LENGTH']:
+        abort(413)
+
 # =============================================================================
 # EXISTING ROUTES (Frontend)
 # =============================================================================
@@ -431,129 +981,207 @@ def placement_analytics():
 # =============================================================================
 
 # Job Routes
+# Every jobs column except the generated fts search vector
+JOB_COLUMNS = (
+    'id, title, description, location, department, company, type, level, salary, requirements, '
+    'benefits, deadline, status, jd_pdf_url, posted_date, created_by, created_at, updated_at'
+)
+
 @app.route('/api/jobs', methods=['POST'])
 def create_job():
     """Create a new job posting"""
-    try:
-        # Check if it's a form submission with file upload
-        if request.content_type and 'multipart/form-data' in request.content_type:
-            # Handle form data with file upload
-            title = request.form.get('title')
-            description = request.form.get('description')
-            company = request.form.get('company')
-            location = request.form.get('location')
-            job_type = request.form.get('type')
-            level = request.form.get('level')
-            salary = request.form.get('salary')
-            requirements = request.form.get('requirements')
-            benefits = request.form.get('benefits')
-            deadline = request.form.get('deadline')
-            status = request.form.get('status', 'draft')
-            created_by = request.form.get('created_by')
-            
-            # Handle JD PDF upload
-            jd_pdf_url = None
-            jd_file = request.files.get('jd_pdf')
-            if jd_file and jd_file.filename:
-                filename = f"jd_{uuid.uuid4().hex}.pdf"
-                jd_path = f"jd_files/{filename}"
-                file_bytes = jd_file.read()
-                supabase_upload(file_bytes, jd_path, 'JD')
-                jd_pdf_url = jd_path
-            
-            job_data = {
-                'title': title,
-                'company': company,
-                'location': location,
-                'type': job_type,
-                'level': level,
-                'salary': salary,
-                'description': description,
-                'requirements': requirements,
-                'benefits': benefits,
-                'deadline': deadline,
-                'status': status,
-                'created_by': created_by,
-                'jd_pdf_url': jd_pdf_url,
-                'posted_date': datetime.now().isoformat()
-            }
-        else:
-            # Handle JSON data
-            data = request.get_json()
-            
-            required_fields = ['title', 'description']
-            for field in required_fields:
-                if not data.get(field):
-                    return jsonify({'ok': False, 'error': f'Missing required field: {field}'}), 400
-            
-            job_data = {
-                'title': data['title'],
-                'company': data.get('company'),
-                'location': data.get('location'),
-                'type': data.get('type'),
-                'level': data.get('level'),
-                'salary': data.get('salary'),
-                'description': data['description'],
-                'requirements': data.get('requirements'),
-                'benefits': data.get('benefits'),
-                'deadline': data.get('deadline'),
-                'status': data.get('status', 'draft'),
-                'created_by': data.get('created_by'),
-                'jd_pdf_url': data.get('jd_pdf_url'),
-                'posted_date': data.get('posted_date', datetime.now().isoformat())
-            }
+    # Check if it's a form submission with file upload
+    if request.content_type and 'multipart/form-data' in request.content_type:
+        # Handle form data with file upload
+        title = request.form.get('title')
+        description = request.form.get('description')
+        company = request.form.get('company')
+        location = request.form.get('location')
+        job_type = request.form.get('type')
+        level = request.form.get('level')
+        salary = request.form.get('salary')
+        requirements = request.form.get('requirements')
+        benefits = request.form.get('benefits')
+        deadline = request.form.get('deadline')
+        status = request.form.get('status', 'draft')
+        created_by = request.form.get('created_by')
+        
+        # Handle JD PDF upload
+        jd_pdf_url = None
+        jd_file = request.files.get('jd_pdf')
+        if jd_file and jd_file.filename:
+            filename = f"jd_{uuid.uuid4().hex}.pdf"
+            jd_path = f"jd_files/{filename}"
+            supabase_upload(jd_file.stream, jd_path, 'JD')
+            jd_pdf_url = jd_path
+        
+        job_data = {
+            'title': title,
+            'company': company,
+            'location': location,
+            'type': job_type,
+            'level': level,
+            'salary': salary,
+            'description': description,
+            'requirements': requirements,
+            'benefits': benefits,
+            'deadline': deadline,
+            'status': status,
+            'created_by': created_by,
+            'jd_pdf_url': jd_pdf_url
+        }
+    else:
+        # Handle JSON data
+        data = request.get_json()
         
-        result = supabase.table('jobs').insert(job_data).execute()
+        required_fields = ['title', 'description']
+        for field in required_fields:
+            if not data.get(field):
+                return jsonify({'ok': False, 'error': f'Missing required field: {field}'}), 400
+        
+        job_data = {
+            'title': data['title'],
+            'company': data.get('company'),
+            'location': data.get('location'),
+            'type': data.get('type'),
+            'level': data.get('level'),
+            'salary': data.get('salary'),
+            'description': data['description'],
+            'requirements': data.get('requirements'),
+            'benefits': data.get('benefits'),
+            'deadline': data.get('deadline'),
+            'status': data.get('status', 'draft'),
+            'created_by': data.get('created_by'),
+            'jd_pdf_url': data.get('jd_pdf_url')
+        }
         
-        if result.data:
-            return jsonify({
-                'ok': True,
-                'job_id': result.data[0]['id'],
-                'message': 'Job created successfully'
-            })
-        else:
-            return jsonify({'ok': False, 'error': 'Failed to create job'}), 500
-            
-    except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+        # posted_date defaults to NOW() in the database unless the client supplies one
+        if data.get('posted_date'):
+            job_data['posted_date'] = data['posted_date']
+    
+    result = supabase.table('jobs').insert(job_data).select('id').execute()
+    
+    if result.data:
+        return jsonify({
+            'ok': True,
+            'job_id': result.data[0]['id'],
+            'message': 'Job created successfully'
+        })
+    else:
+        return jsonify({'ok': False, 'error': 'Failed to create job'}), 500
+
+# Job search keeps words, quotes and '-' for websearch syntax; PostgREST reserves ,().: in filters
+SEARCH_UNSAFE_CHARS_RE = re.compile(r'[^\w\s"\'-]')
+SEARCH_MAX_LENGTH = 100
 
 @app.route('/api/jobs', methods=['GET'])
 def get_jobs():
     """Get list of jobs with optional filtering"""
-    try:
-        limit = int(request.args.get('limit', 50))
-        offset = int(request.args.get('offset', 0))
-        search = request.args.get('search', '')
-        status = request.args.get('status', '')
-        
-        query = supabase.table('jobs').select('*')
-        
-        if search:
-            query = query.or_(f'title.ilike.%{search}%,description.ilike.%{search}%,company.ilike.%{search}%')
-        
-        if status:
-            query = query.eq('status', status)
-        
-        result = query.range(offset, offset + limit - 1).execute()
-        
-        return jsonify({
-            'ok': True,
-            'jobs': result.data,
-            'total': len(result.data)
-        })
-        
-    except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+    limit = int(request.args.get('limit', 50))
+    offset = int(request.args.get('offset', 0))
+    search = SEARCH_UNSAFE_CHARS_RE.sub(' ', request.args.get('search', ''))
+    search = ' '.join(search.split())[:SEARCH_MAX_LENGTH]
+    status = request.args.get('status', '')
+    
+    # Total comes back in the Content-Range header; 'estimated' avoids a full COUNT(*) on large tables
+    query = supabase.table('jobs').select(JOB_COLUMNS, count='estimated')
+    
+    if search:
+        # Full-text match on the GIN-indexed fts column (title, description, company)
+        query = query.filter('fts', 'wfts(english)', search)
+    
+    if status:
+        query = query.eq('status', status)
+    
+    result = query.order('posted_date', desc=True).range(offset, offset + limit - 1).execute()
+    
+    # ETag is a hash of the body, so it already varies with limit/offset/search/status
+    response = jsonify({
+        'ok': True,
+        'jobs': result.data,
+        'total': result.count if result.count is not None else len(result.data)
+    })
+    response.add_etag()
+    response.headers['Cache-Control'] = 'private, max-age=60'
+    return response.make_conditional(request)
 
 @app.route('/api/jobs/<job_id>', methods=['GET'])
 def get_job(job_id):
     """Get a single job by ID"""
-    try:
-        result = supabase.table('jobs').select('*').eq('id', job_id).execute()
+    result = supabase.table('jobs').select(JOB_COLUMNS).eq('id', job_id).execute()
+    
+    if not result.data:
+        return jsonify({'ok': False, 'error': 'Job not found'}), 404
+    
+    job = result.data[0]
+    
+    # Generate signed URL for JD PDF if it exists (normally served from the signed URL cache)
+    if job.get('jd_pdf_url'):
+        try:
+            job['jd_pdf_signed_url'] = supabase_signed_url(job['jd_pdf_url'], bucket='JD')
+        except:
+            job['jd_pdf_signed_url'] = None
+    
+    # The signed URL is part of the version, so the ETag changes when it is re-signed before expiry
+    etag = hashlib.md5(f"{job['id']}:{job.get('updated_at')}:{job.get('jd_pdf_signed_url')}".encode()).hexdigest()
+    
+    # Skip serialization when the client already has this version
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = jsonify({
+            'ok': True,
+            'job': job
+        })
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, max-age=60'
+    return response
+
+@app.route('/api/jobs/<job_id>', methods=['PUT'])
+def update_job(job_id):
+    """Update a job posting"""
+    # Check if it's a form submission with file upload
+    if request.content_type and 'multipart/form-data' in request.content_type:
+        # Handle form data with file upload
+        update_data = {}
+        allowed_fields = ['title', 'company', 'location', 'type', 'level', 'salary', 
+                         'description', 'requirements', 'benefits', 'deadline', 'status']
+        
+        for field in allowed_fields:
+            value = request.form.get(field)
+            if value is not None:
+                update_data[field] = value
+        
+        # Handle JD PDF upload
+        jd_file = request.files.get('jd_pdf')
+        if jd_file and jd_file.filename:
+            filename = f"jd_{uuid.uuid4().hex}.pdf"
+            jd_path = f"jd_files/{filename}"
+            supabase_upload(jd_file.stream, jd_path, 'JD')
+            update_data['jd_pdf_url'] = jd_path
+        
+        if not update_data:
+            return jsonify({'ok': False, 'error': 'No valid fields to update'}), 400
+    else:
+        # Handle JSON data
+        data = request.get_json()
         
-        if not result.data:
-            return jsonify({'ok': False, 'error': 'Job not found'}), 404
+        # Only update fields that are provided
+        update_data = {}
+        allowed_fields = ['title', 'company', 'location', 'type', 'level', 'salary', 
+                         'description', 'requirements', 'benefits', 'deadline', 'status', 'jd_pdf_url']
         
+        for field in allowed_fields:
+            if field in data:
+                update_data[field] = data[field]
+        
+        if not update_data:
+            return jsonify({'ok': False, 'error': 'No valid fields to update'}), 400
+    
+    result = supabase.table('jobs').update(update_data).eq('id', job_id).select(JOB_COLUMNS).execute()
+    
+    if result.data:
         job = result.data[0]
         
         # Generate signed URL for JD PDF if it exists
@@ -565,378 +1193,313 @@ def get_job(job_id):
         
         return jsonify({
             'ok': True,
-            'job': job
+            'job': job,
+            'message': 'Job updated successfully'
         })
-        
-    except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
-
-@app.route('/api/jobs/<job_id>', methods=['PUT'])
-def update_job(job_id):
-    """Update a job posting"""
-    try:
-        # Check if it's a form submission with file upload
-        if request.content_type and 'multipart/form-data' in request.content_type:
-            # Handle form data with file upload
-            update_data = {}
-            allowed_fields = ['title', 'company', 'location', 'type', 'level', 'salary', 
-                             'description', 'requirements', 'benefits', 'deadline', 'status']
-            
-            for field in allowed_fields:
-                value = request.form.get(field)
-                if value is not None:
-                    update_data[field] = value
-            
-            # Handle JD PDF upload
-            jd_file = request.files.get('jd_pdf')
-            if jd_file and jd_file.filename:
-                filename = f"jd_{uuid.uuid4().hex}.pdf"
-                jd_path = f"jd_files/{filename}"
-                file_bytes = jd_file.read()
-                supabase_upload(file_bytes, jd_path, 'JD')
-                update_data['jd_pdf_url'] = jd_path
-            
-            if not update_data:
-                return jsonify({'ok': False, 'error': 'No valid fields to update'}), 400
-        else:
-            # Handle JSON data
-            data = request.get_json()
-            
-            # Only update fields that are provided
-            update_data = {}
-            allowed_fields = ['title', 'company', 'location', 'type', 'level', 'salary', 
-                             'description', 'requirements', 'benefits', 'deadline', 'status', 'jd_pdf_url']
-            
-            for field in allowed_fields:
-                if field in data:
-                    update_data[field] = data[field]
-            
-            if not update_data:
-                return jsonify({'ok': False, 'error': 'No valid fields to update'}), 400
-        
-        result = supabase.table('jobs').update(update_data).eq('id', job_id).execute()
-        
-        if result.data:
-            job = result.data[0]
-            
-            # Generate signed URL for JD PDF if it exists
-            if job.get('jd_pdf_url'):
-                try:
-                    job['jd_pdf_signed_url'] = supabase_signed_url(job['jd_pdf_url'], bucket='JD')
-                except:
-                    job['jd_pdf_signed_url'] = None
-            
-            return jsonify({
-                'ok': True,
-                'job': job,
-                'message': 'Job updated successfully'
-            })
-        else:
-            return jsonify({'ok': False, 'error': 'Job not found or update failed'}), 404
-            
-    except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+    else:
+        return jsonify({'ok': False, 'error': 'Job not found or update failed'}), 404
 
 @app.route('/api/jobs/<job_id>', methods=['DELETE'])
 def delete_job(job_id):
     """Delete a job posting"""
-    try:
-        result = supabase.table('jobs').delete().eq('id', job_id).execute()
-        
-        if result.data:
-            return jsonify({
-                'ok': True,
-                'message': 'Job deleted successfully'
-            })
-        else:
-            return jsonify({'ok': False, 'error': 'Job not found'}), 404
-            
-    except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+    result = supabase.table('jobs').delete().eq('id', job_id).execute()
+    
+    if result.data:
+        return jsonify({
+            'ok': True,
+            'message': 'Job deleted successfully'
+        })
+    else:
+        return jsonify({'ok': False, 'error': 'Job not found'}), 404
 
 # Application Routes
 @app.route('/api/apply', methods=['POST'])
 def apply_to_job():
     """Submit job application with resume upload"""
+    # Get form data
+    student_id = request.form.get('student_id')
+    job_id = request.form.get('job_id')
+    name = request.form.get('name')
+    email = request.form.get('email')
+    phone = request.form.get('phone')
+    college = request.form.get('college', '')
+    file = request.files.get('file')
+    
+    if not all([job_id, name, email, phone, file]):
+        return jsonify({'ok': False, 'error': 'Missing required fields'}), 400
+    
+    # Read file bytes once and release the spooled upload; extraction and upload share this one copy
+    file_bytes = file.read()
+    file.close()
+    
+    # Extract text while the student record is resolved
+    text_future = io_executor.submit(extract_text, file_bytes, file.filename)
+    
+    # Check if student already exists by email
+    existing_student_result = supabase.table('students').select('id').eq('email', email).limit(1).execute()
+    
+    is_new_student = not existing_student_result.data
+    if is_new_student:
+        # New students get their id here so the resume upload doesn't wait on the insert
+        student_id = str(uuid.uuid4())
+    else:
+        # Use existing student
+        student_id = existing_student_result.data[0]['id']
+    
+    resume_text = text_future.result()
+    
+    # Upload resume to Supabase while the student and application records are created
+    filename = f"{student_id}_{job_id}_{uuid.uuid4().hex}.pdf"
+    resume_path = f"resumes/{filename}"
+    upload_future = io_executor.submit(supabase_upload, file_bytes, resume_path, 'resume')
+    
     try:
-        # Get form data
-        student_id = request.form.get('student_id')
-        job_id = request.form.get('job_id')
-        name = request.form.get('name')
-        email = request.form.get('email')
-        phone = request.form.get('phone')
-        college = request.form.get('college', '')
-        file = request.files.get('file')
-        
-        if not all([job_id, name, email, phone, file]):
-            return jsonify({'ok': False, 'error': 'Missing required fields'}), 400
-        
-        # Check if student already exists by email
-        existing_student_result = supabase.table('students').select('*').eq('email', email).execute()
-        
-        if existing_student_result.data:
-            # Use existing student
-            student_id = existing_student_result.data[0]['id']
-        else:
+        if is_new_student:
             # Create new student record
             student_data = {
+                'id': student_id,
                 'full_name': name,
                 'email': email,
                 'phone': phone,
-                'college': college,
-                'created_at': datetime.now().isoformat()
+                'college': college
             }
             
-            student_result = supabase.table('students').insert(student_data).execute()
-            
-            if not student_result.data:
-                return jsonify({'ok': False, 'error': 'Failed to create student record'}), 500
-            
-            student_id = student_result.data[0]['id']
-        
-        # Read file bytes and extract text
-        file_bytes = file.read()
-        resume_text = extract_text(file_bytes, file.filename)
-        
-        # Create temp folder and save extracted text
-        temp_dir = tempfile.mkdtemp()
-        temp_text_file = os.path.join(temp_dir, f"resume_text_{uuid.uuid4().hex}.txt")
-        
-        try:
-            with open(temp_text_file, 'w', encoding='utf-8') as f:
-                f.write(resume_text)
-        except Exception as e:
-            print(f"Error saving temp text file: {e}")
-            # Continue without temp file if there's an issue
-        
-        # Upload resume to Supabase
-        filename = f"{student_id}_{job_id}_{uuid.uuid4().hex}.pdf"
-        resume_path = f"resumes/{filename}"
-        supabase_upload(file_bytes, resume_path, 'resume')
+            # Nothing needs reading back, so skip returning the row
+            supabase.table('students').insert(student_data, returning='minimal').execute()
         
         # Create application record with student_id
         application_data = {
             'student_id': student_id,
             'job_id': job_id,
             'resume_url': resume_path,
-            'created_at': datetime.now().isoformat()
+            'resume_text': resume_text,
+            'evaluation_status': 'pending'
         }
         
         result = supabase.table('applications').insert(application_data).execute()
-        
-        if result.data:
-            print(result.data)
-            print(result.data[0]['id'])
-            application_id = result.data[0]['id']
-            
-            # Trigger AI evaluation with extracted text
-            evaluation_result = evaluate_application(application_id, resume_text)
-            
-            # Clean up temp directory
-            try:
-                shutil.rmtree(temp_dir)
-            except Exception as e:
-                print(f"Error cleaning up temp directory: {e}")
-            
-            return jsonify({
-                'ok': True,
-                'application_id': application_id,
-                'evaluation': evaluation_result
-            })
-        else:
-            return jsonify({'ok': False, 'error': 'Failed to create application'}), 500
-            
-    except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+    except Exception:
+        # Don't leave the uploaded resume behind without an application
+        discard_upload(upload_future, resume_path, 'resume')
+        raise
+    
+    if not result.data:
+        discard_upload(upload_future, resume_path, 'resume')
+        return jsonify({'ok': False, 'error': 'Failed to create application'}), 500
+    
+    try:
+        upload_future.result()
+    except Exception:
+        # Don't leave an application pointing at a resume that was never stored
+        supabase.table('applications').delete().eq('id', result.data[0]['id']).execute()
+        raise
+    
+    application_id = result.data[0]['id']
+    
+    # Queue AI evaluation with extracted text; clients poll the application for the verdict
+    evaluation_status = enqueue_evaluation(application_id, resume_text)
+    
+    return jsonify({
+        'ok': True,
+        'application_id': application_id,
+        'status': evaluation_status or 'pending'
+    }), 200 if evaluation_status else 202
+
+# List views only read the evaluation summary, contact details and job headline; resume_text stays out
+APPLICATION_LIST_COLUMNS = (
+    'id, student_id, job_id, status, evaluation_status, verdict, relevance_score, applied_for, summary, skills, '
+    'strong_points, weak_points, resume_url, created_at, '
+    'students(full_name, email, phone, college), jobs(id, title, company, location)'
+)
 
 @app.route('/api/applications', methods=['GET'])
 def get_applications():
     """Get applications - either for a specific job or all applications"""
-    try:
-        job_id = request.args.get('job_id')
-        signed = request.args.get('signed', 'false').lower() == 'true'
-        
-        # Build query - fetch applications and related data separately to avoid relationship issues
-        if job_id:
-            # Get applications for specific job
-            query = supabase.table('applications').select('*').eq('job_id', job_id)
-        else:
-            # Get all applications
-            query = supabase.table('applications').select('*')
-        
-        result = query.execute()
-        applications = result.data
-        
-        # Fetch related student and job data separately
+    job_id = request.args.get('job_id')
+    signed = request.args.get('signed', 'false').lower() == 'true'
+    
+    # Build query - related student and job rows are embedded server-side in one round-trip
+    if job_id:
+        # Get applications for specific job
+        query = supabase.table('applications').select(APPLICATION_LIST_COLUMNS).eq('job_id', job_id)
+    else:
+        # Get all applications
+        query = supabase.table('applications').select(APPLICATION_LIST_COLUMNS)
+    
+    result = query.execute()
+    applications = result.data
+    
+    # Keep the previous shape: missing relations are empty objects
+    for app in applications:
+        app['students'] = app.get('students') or {}
+        app['jobs'] = app.get('jobs') or {}
+    
+    # Generate signed URLs if requested, in one storage request
+    if signed:
+        paths = [app['resume_url'] for app in applications if app.get('resume_url')]
+        try:
+            signed_urls = supabase_signed_urls(paths)
+        except:
+            signed_urls = {}
         for app in applications:
-            # Get student data
-            if app.get('student_id'):
-                student_result = supabase.table('students').select('*').eq('id', app['student_id']).execute()
-                app['students'] = student_result.data[0] if student_result.data else {}
-            
-            # Get job data
-            if app.get('job_id'):
-                job_result = supabase.table('jobs').select('*').eq('id', app['job_id']).execute()
-                app['jobs'] = job_result.data[0] if job_result.data else {}
-        
-        # Generate signed URLs if requested
-        if signed:
-            for app in applications:
-                if app['resume_url']:
-                    try:
-                        app['resume_signed_url'] = supabase_signed_url(app['resume_url'])
-                    except:
-                        app['resume_signed_url'] = None
-        
-        return jsonify({
-            'ok': True,
-            'applications': applications
-        })
-        
-    except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+            if app.get('resume_url'):
+                app['resume_signed_url'] = signed_urls.get(app['resume_url'])
+    
+    return jsonify({
+        'ok': True,
+        'applications': applications
+    })
 
 @app.route('/api/application/<application_id>', methods=['GET'])
 def get_application(application_id):
     """Get full application details"""
-    try:
-        signed = request.args.get('signed', 'false').lower() == 'true'
-        
-        result = supabase.table('applications').select('*').eq('id', application_id).execute()
-        
-        if not result.data:
-            return jsonify({'ok': False, 'error': 'Application not found'}), 404
-        
-        application = result.data[0]
-        
-        # Fetch related student and job data separately
-        if application.get('student_id'):
-            student_result = supabase.table('students').select('*').eq('id', application['student_id']).execute()
-            application['students'] = student_result.data[0] if student_result.data else {}
-        
-        if application.get('job_id'):
-            job_result = supabase.table('jobs').select('*').eq('id', application['job_id']).execute()
-            application['jobs'] = job_result.data[0] if job_result.data else {}
-        
-        # Generate signed URL for resume if requested
-        if signed and application.get('resume_url'):
-            try:
-                application['resume_signed_url'] = supabase_signed_url(application['resume_url'])
-            except Exception as e:
-                print(f"Error generating signed URL: {e}")
-                application['resume_signed_url'] = None
-        
-        return jsonify({
-            'ok': True,
-            'application': application
-        })
-        
-    except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+    signed = request.args.get('signed', 'false').lower() == 'true'
+    
+    result = supabase.table('applications').select(f'*, students(*), jobs({JOB_COLUMNS})').eq('id', application_id).execute()
+    
+    if not result.data:
+        return jsonify({'ok': False, 'error': 'Application not found'}), 404
+    
+    application = result.data[0]
+    application['students'] = application.get('students') or {}
+    application['jobs'] = application.get('jobs') or {}
+    
+    # Generate signed URL for resume if requested
+    if signed and application.get('resume_url'):
+        try:
+            application['resume_signed_url'] = supabase_signed_url(application['resume_url'])
+        except Exception as e:
+            print(f"Error generating signed URL: {e}")
+            application['resume_signed_url'] = None
+    
+    return jsonify({
+        'ok': True,
+        'application': application
+    })
 
 @app.route('/api/applications/<application_id>', methods=['PATCH'])
 def update_application(application_id):
     """Update application status or other fields"""
-    try:
-        data = request.get_json()
-        
-        # Only update fields that are provided
-        update_data = {}
-        allowed_fields = ['status', 'verdict', 'relevance_score', 'strong_points', 'weak_points']
-        
-        for field in allowed_fields:
-            if field in data:
-                update_data[field] = data[field]
-        
-        if not update_data:
-            return jsonify({'ok': False, 'error': 'No valid fields to update'}), 400
-        
-        result = supabase.table('applications').update(update_data).eq('id', application_id).execute()
-        
-        if result.data:
-            return jsonify({
-                'ok': True,
-                'application': result.data[0],
-                'message': 'Application updated successfully'
-            })
-        else:
-            return jsonify({'ok': False, 'error': 'Application not found or update failed'}), 404
-            
-    except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+    data = request.get_json()
+    
+    # Only update fields that are provided
+    update_data = {}
+    allowed_fields = ['status', 'verdict', 'relevance_score', 'strong_points', 'weak_points']
+    
+    for field in allowed_fields:
+        if field in data:
+            update_data[field] = data[field]
+    
+    if not update_data:
+        return jsonify({'ok': False, 'error': 'No valid fields to update'}), 400
+    
+    result = supabase.table('applications').update(update_data).eq('id', application_id).execute()
+    
+    if result.data:
+        return jsonify({
+            'ok': True,
+            'application': result.data[0],
+            'message': 'Application updated successfully'
+        })
+    else:
+        return jsonify({'ok': False, 'error': 'Application not found or update failed'}), 404
 
 # AI Evaluation Route
 @app.route('/api/evaluate', methods=['POST'])
 def evaluate_application_route():
     """Trigger AI evaluation for an application"""
-    try:
-        data = request.get_json()
-        application_id = data.get('application_id')
-        
-        if not application_id:
-            return jsonify({'ok': False, 'error': 'application_id required'}), 400
-        
-        result = evaluate_application(application_id)
-        return jsonify(result)
-        
-    except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+    data = request.get_json()
+    application_id = data.get('application_id')
+    
+    if not application_id:
+        return jsonify({'ok': False, 'error': 'application_id required'}), 400
+    
+    # Evaluation takes seconds; poll /api/application/<id> for the verdict
+    set_evaluation_status(application_id, 'pending')
+    evaluation_status = enqueue_evaluation(application_id)
+    
+    return jsonify({
+        'ok': True,
+        'application_id': application_id,
+        'status': evaluation_status or 'pending'
+    }), 200 if evaluation_status else 202
+
+@app.route('/api/evaluate/batch', methods=['POST'])
+def evaluate_applications_batch_route():
+    """Trigger AI evaluation for several applications at once"""
+    data = request.get_json()
+    application_ids = data.get('application_ids')
+    
+    if not application_ids or not isinstance(application_ids, list):
+        return jsonify({'ok': False, 'error': 'application_ids required'}), 400
+    
+    if len(application_ids) > EVALUATION_BATCH_MAX_IDS:
+        return jsonify({'ok': False, 'error': f'At most {EVALUATION_BATCH_MAX_IDS} application_ids per request'}), 400
+    
+    # LLM calls take seconds per batch; poll each application for its verdict
+    supabase.table('applications').update({'evaluation_status': 'pending', 'evaluation_error': None}).in_('id', application_ids).execute()
+    evaluation_statuses = enqueue_evaluation_batch(application_ids)
+    
+    if evaluation_statuses:
+        return jsonify({
+            'ok': True,
+            'application_ids': application_ids,
+            'status': 'completed' if all(status == 'completed' for status in evaluation_statuses.values()) else 'failed',
+            'evaluation_statuses': evaluation_statuses
+        })
+    
+    return jsonify({
+        'ok': True,
+        'application_ids': application_ids,
+        'status': 'pending'
+    }), 202
 
 # NLP to SQL Route
 @app.route('/api/nlpsql', methods=['POST'])
 def nlp_to_sql():
     """Convert natural language query to SQL"""
-    try:
-        data = request.get_json()
-        query = data.get('query')
-        
-        
-        if not query:
-            return jsonify({'ok': False, 'error': 'query required'}), 400
-        
-        # Translate to SQL
-        sql_result = translate_to_sql(query)
-        
-        if not sql_result['ok']:
-            return jsonify(sql_result), 400
-        
-        # Execute SQL
-        execution_result = validate_and_execute_sql(sql_result['sql'])
-        
-        return jsonify(execution_result)
-        
-    except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+    data = request.get_json()
+    query = data.get('query')
+    
+    
+    if not query:
+        return jsonify({'ok': False, 'error': 'query required'}), 400
+    
+    # Translate to SQL
+    sql_result = translate_to_sql(query)
+    
+    if not sql_result['ok']:
+        return jsonify(sql_result), 400
+    
+    # Execute SQL
+    execution_result = validate_and_execute_sql(sql_result['sql'])
+    
+    return jsonify(execution_result)
 
 # Email Route
 @app.route('/api/email/send', methods=['POST'])
 def send_email_route():
     """Send email to candidate"""
-    try:
-        data = request.get_json()
-        application_id = data.get('application_id')
-        subject = data.get('subject')
-        body = data.get('body')
-        from_alias = data.get('from_alias', 'Hiring Portal')
-        
-        if not all([application_id, subject, body]):
-            return jsonify({'ok': False, 'error': 'Missing required fields'}), 400
-        
-        # Get application and student email
-        result = supabase.table('applications').select('students(email)').eq('id', application_id).execute()
-        
-        if not result.data:
-            return jsonify({'ok': False, 'error': 'Application not found'}), 404
-        
-        student_email = result.data[0]['students']['email']
-        
-        # Send email
-        email_result = send_email(student_email, subject, body, from_alias)
-        
-        return jsonify(email_result)
-        
-    except Exception as e:
-        return jsonify({'ok': False, 'error': str(e)}), 500
+    data = request.get_json()
+    application_id = data.get('application_id')
+    subject = data.get('subject')
+    body = data.get('body')
+    from_alias = data.get('from_alias', 'Hiring Portal')
+    
+    if not all([application_id, subject, body]):
+        return jsonify({'ok': False, 'error': 'Missing required fields'}), 400
+    
+    # Get application and student email
+    result = supabase.table('applications').select('students(email)').eq('id', application_id).execute()
+    
+    if not result.data:
+        return jsonify({'ok': False, 'error': 'Application not found'}), 404
+    
+    student_email = result.data[0]['students']['email']
+    
+    # Send email
+    email_result = send_email(student_email, subject, body, from_alias)
+    
+    return jsonify(email_result)
 
 # =============================================================================
 # ERROR HANDLERS
@@ -946,13 +1509,25 @@ def send_email_route():
 def not_found(error):
     return jsonify({'ok': False, 'error': 'Not found'}), 404
 
+@app.errorhandler(413)
+def request_too_large(error):
+    return jsonify({'ok': False, 'error': 'Uploaded file is too large'}), 413
+
 @app.errorhandler(500)
 def internal_error(error):
     return jsonify({'ok': False, 'error': 'Internal server error'}), 500
 
+@app.errorhandler(Exception)
+def unhandled_error(error):
+    """Report any error a route lets escape in the standard JSON shape"""
+    if isinstance(error, HTTPException):
+        return jsonify({'ok': False, 'error': error.description}), error.code
+    return jsonify({'ok': False, 'error': str(error)}), 500
+
 # =============================================================================
 # MAIN
 # =============================================================================
 
-#if __name__ == '__main__':
-#    app.run(debug=True, host='0.0.0.0', port=5000)
+# Development server only; production runs under gunicorn (see gunicorn.conf.py)
+if __name__ == '__main__':
+    app.run(debug=os.getenv('FLASK_DEBUG') == '1', host='0.0.0.0', port=int(os.getenv('PORT', 5000)))
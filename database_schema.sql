@@ -31,18 +31,27 @@ CREATE TABLE IF NOT EXISTS jobs (
     deadline DATE,
     status TEXT DEFAULT 'draft',
     jd_pdf_url TEXT,
-    posted_date TIMESTAMP WITH TIME ZONE,
+    posted_date TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     created_by UUID REFERENCES auth.users(id) ON DELETE SET NULL,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Timestamps are set by Postgres rather than the app server's clock
+ALTER TABLE jobs ALTER COLUMN posted_date SET DEFAULT NOW();
+
+-- Full-text search vector for job listings, maintained by Postgres
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS fts TSVECTOR GENERATED ALWAYS AS (
+    to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, '') || ' ' || coalesce(company, ''))
+) STORED;
+
 -- Applications table
 CREATE TABLE IF NOT EXISTS applications (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     student_id UUID REFERENCES students(id) ON DELETE CASCADE,
     job_id UUID REFERENCES jobs(id) ON DELETE CASCADE,
     resume_url TEXT,
+    resume_text TEXT,
     relevance_score INTEGER,
     verdict TEXT,
     strong_points TEXT[],
@@ -53,9 +62,22 @@ CREATE TABLE IF NOT EXISTS applications (
     experience TEXT,
     summary TEXT,
     applied_for TEXT,
+    status TEXT DEFAULT 'pending',
+    evaluation_status TEXT,
+    evaluation_error TEXT,
     created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT NOW()
 );
 
+-- Extracted resume text, cached so re-evaluations skip the download and parse
+ALTER TABLE applications ADD COLUMN IF NOT EXISTS resume_text TEXT;
+
+-- Review status shown on the placement dashboard ('pending', 'reviewed', 'shortlisted', 'rejected', 'hired')
+ALTER TABLE applications ADD COLUMN IF NOT EXISTS status TEXT DEFAULT 'pending';
+
+-- Background AI evaluation progress ('pending', 'completed', 'failed') and the last failure message
+ALTER TABLE applications ADD COLUMN IF NOT EXISTS evaluation_status TEXT;
+ALTER TABLE applications ADD COLUMN IF NOT EXISTS evaluation_error TEXT;
+
 -- AI Audit table for tracking AI evaluations
 CREATE TABLE IF NOT EXISTS ai_audit (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -70,6 +92,8 @@ CREATE INDEX IF NOT EXISTS idx_students_email ON students(email);
 CREATE INDEX IF NOT EXISTS idx_students_user_id ON students(user_id);
 CREATE INDEX IF NOT EXISTS idx_jobs_created_by ON jobs(created_by);
 CREATE INDEX IF NOT EXISTS idx_jobs_created_at ON jobs(created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_fts ON jobs USING GIN(fts);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_posted_date ON jobs(status, posted_date DESC);
 CREATE INDEX IF NOT EXISTS idx_applications_student_id ON applications(student_id);
 CREATE INDEX IF NOT EXISTS idx_applications_job_id ON applications(job_id);
 CREATE INDEX IF NOT EXISTS idx_applications_relevance_score ON applications(relevance_score);
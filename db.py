@@ -0,0 +1,37 @@
+"""
+Shared Supabase client for the Hiring Portal.
+The client is created once per process and imported by every route, so all
+PostgREST and storage calls share one pooled HTTP connection set.
+"""
+
+import os
+import httpx
+from supabase import create_client, Client, ClientOptions
+
+# Environment
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+SUPABASE_URL = os.getenv('SUPABASE_URL')
+SUPABASE_ANON_KEY = os.getenv('SUPABASE_ANON_KEY')
+# SUPABASE_SERVICE_ROLE_KEY = os.getenv('SUPABASE_SERVICE_ROLE_KEY')
+
+# if not all([SUPABASE_URL, SUPABASE_ANON_KEY, SUPABASE_SERVICE_ROLE_KEY]):
+#     raise ValueError("Missing required Supabase environment variables")
+
+# One pooled HTTP client per process so PostgREST/storage calls reuse TCP+TLS connections
+supabase_http = httpx.Client(
+    limits=httpx.Limits(
+        max_connections=int(os.getenv('SUPABASE_MAX_CONNECTIONS', 50)),
+        max_keepalive_connections=int(os.getenv('SUPABASE_MAX_KEEPALIVE', 20))
+    ),
+    timeout=30
+)
+
+supabase: Client = create_client(
+    SUPABASE_URL,
+    SUPABASE_ANON_KEY,
+    options=ClientOptions(httpx_client=supabase_http)
+)
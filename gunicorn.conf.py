@@ -0,0 +1,15 @@
+"""
+Gunicorn configuration for the Hiring Portal.
+Requests spend most of their time waiting on Supabase, storage and the LLM
+API, so each worker process serves several of them at once on threads.
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 60))
+keepalive = 5
@@ -103,10 +103,9 @@ def test_imports():
         'supabase',
         'groq',
         'google.generativeai',
-        'sentence_transformers',
         'pdfplumber',
+        'pymupdf',
         'docx',
-        'psycopg2',
         'sqlalchemy',
         'smtplib',
         'dotenv'